@@ -1,6 +1,7 @@
 """
 Property Price Prediction API package
 """
+from . import config  # noqa: F401  (pins native thread pools before numpy loads)
 from .main import app
 
 __version__ = "1.0.0"
@@ -0,0 +1,92 @@
+"""
+Dynamic micro-batching of model predictions
+"""
+import asyncio
+
+import numpy as np
+
+
+class PredictionBatcher:
+    """
+    Collect concurrent single-row predictions and run them as one batch
+
+    Model calls always run in a worker thread so the event loop keeps serving
+    requests; with ``max_batch <= 1`` each row is predicted on its own.
+    """
+
+    def __init__(self, predict_fn, n_features: int, max_batch: int = 32, max_wait_ms: float = 5.0):
+        self.predict_fn = predict_fn
+        self.n_features = n_features
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._task = None
+        self._buffer = None
+
+    def start(self):
+        """Start the background batching task on the running event loop"""
+        if self.max_batch <= 1:
+            return
+        # Batches run one at a time, so a single float32 buffer is reused
+        self._buffer = np.empty((self.max_batch, self.n_features), dtype=np.float32)
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Cancel the background batching task"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def predict(self, row: np.ndarray):
+        """Queue a single feature row and wait for its prediction"""
+        if self._task is None:
+            predictions = await asyncio.to_thread(self.predict_fn, row[np.newaxis])
+            return np.asarray(predictions).reshape(-1)[0]
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    async def _run(self):
+        """Gather rows until the batch is full or the wait window closes"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._predict_batch(batch)
+
+    async def _predict_batch(self, batch):
+        """Run one model call for the batch and resolve each waiting request"""
+        try:
+            X = self._buffer[:len(batch)]
+            for i, (row, _) in enumerate(batch):
+                X[i] = row
+            predictions = await asyncio.to_thread(self.predict_fn, X)
+            # Some backends squeeze a one-row batch into a 0-d array
+            predictions = np.asarray(predictions).reshape(-1)
+            if len(predictions) != len(batch):
+                raise ValueError(f"Model returned {len(predictions)} predictions for {len(batch)} rows")
+        except Exception as e:
+            # Fail this batch's requests but keep the batching loop alive
+            print(f"Warning: prediction batch of {len(batch)} rows failed: {e!r}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), prediction in zip(batch, predictions):
+            # Futures of disconnected clients are already cancelled
+            if not future.done():
+                future.set_result(prediction)
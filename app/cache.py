@@ -0,0 +1,28 @@
+"""
+In-memory caching of model predictions
+"""
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """Least-recently-used cache of predictions keyed by model input"""
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def get(self, key):
+        """Return the cached prediction for key, or None on a miss"""
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        """Store a prediction, evicting the least recently used one if full"""
+        if self.maxsize <= 0:
+            return
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
@@ -2,19 +2,48 @@
 Configuration and utilities for the FastAPI application
 """
 import os
+
+# Keep native thread pools to one thread per process; concurrency comes from
+# request batching and uvicorn workers. Must run before numpy is imported.
+for _var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(_var, "1")
+
+from itertools import combinations
 from pathlib import Path
 from datetime import datetime
 import joblib
+import numpy as np
 
 # Paths
 BASE_DIR = Path(__file__).resolve().parent.parent
 MODELS_DIR = BASE_DIR / "models"
 DATA_DIR = BASE_DIR / "data" / "processed"
 
+# Data paths
+DATA_PATH = DATA_DIR / "data_processed.parquet"
+DATA_CSV_PATH = DATA_DIR / "data_processed.csv"
+
+# Location columns the /filter endpoint can filter on
+FILTER_COLUMNS = ("voivodeship", "city", "district")
+
+# Dataset columns used to build the statistics tables
+DATA_COLUMNS = ("Price", "Area (m²)", "Number of rooms", "year_const") + FILTER_COLUMNS
+
 # Model paths
 MODEL_PATH = MODELS_DIR / "price_model.joblib"
 ENCODERS_PATH = MODELS_DIR / "label_encoders.joblib"
 FEATURES_PATH = MODELS_DIR / "features.joblib"
+COMPILED_MODEL_PATH = MODELS_DIR / "price_model.so"
+
+# Micro-batching of concurrent /predict calls
+PREDICT_MAX_BATCH = int(os.getenv("PREDICT_MAX_BATCH", "32"))
+PREDICT_MAX_WAIT_MS = float(os.getenv("PREDICT_MAX_WAIT_MS", "5"))
+
+# Upper bound on how long a /predict call waits for its model result
+PREDICT_TIMEOUT_S = float(os.getenv("PREDICT_TIMEOUT_S", "10"))
+
+# Number of distinct /predict inputs whose results are memoized (0 disables)
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "4096"))
 
 # Model metadata
 MODEL_METADATA = {
@@ -36,6 +65,39 @@ def load_model():
     return joblib.load(MODEL_PATH)
 
 
+def is_stale(artifact, source):
+    """Check whether a derived artifact is older than the file it was built from"""
+    return source.exists() and artifact.stat().st_mtime < source.stat().st_mtime
+
+
+def load_compiled_model():
+    """
+    Load the Treelite-compiled model as a predict function
+
+    Returns None when the compiled library or treelite_runtime is not
+    available, or when the library predates the trained model, in which
+    case the sklearn model should be used instead.
+    """
+    if not COMPILED_MODEL_PATH.exists():
+        return None
+    if is_stale(COMPILED_MODEL_PATH, MODEL_PATH):
+        print(f"Warning: {COMPILED_MODEL_PATH} is older than {MODEL_PATH}, ignoring it "
+              "(rerun prepare_artifacts.py)")
+        return None
+    try:
+        import treelite_runtime
+    except ImportError:
+        return None
+    # Single-threaded: concurrent requests are already batched by the API
+    predictor = treelite_runtime.Predictor(str(COMPILED_MODEL_PATH), nthread=1)
+
+    def predict(X):
+        # Treelite squeezes a one-row batch into a 0-d array
+        return np.asarray(predictor.predict(treelite_runtime.DMatrix(X, dtype="float32"))).reshape(-1)
+
+    return predict
+
+
 def load_encoders():
     """Load label encoders from disk"""
     if not ENCODERS_PATH.exists():
@@ -50,31 +112,90 @@ def load_features():
     return joblib.load(FEATURES_PATH)
 
 
-# Global model cache
-_model = None
-_encoders = None
-_features = None
-
-
-def get_model():
-    """Get the loaded model (cached)"""
-    global _model
-    if _model is None:
-        _model = load_model()
-    return _model
-
-
-def get_encoders():
-    """Get the loaded encoders (cached)"""
-    global _encoders
-    if _encoders is None:
-        _encoders = load_encoders()
-    return _encoders
-
-
-def get_features():
-    """Get the loaded features (cached)"""
-    global _features
-    if _features is None:
-        _features = load_features()
-    return _features
+def load_dataframe():
+    """
+    Load the columns of the processed property dataset used by the API
+
+    Reads the Parquet copy made by prepare_artifacts.py when present and
+    up to date, and falls back to the CSV otherwise.
+    """
+    # pandas is only needed to build lookup tables at startup
+    import pandas as pd
+
+    use_parquet = DATA_PATH.exists()
+    if use_parquet and is_stale(DATA_PATH, DATA_CSV_PATH):
+        print(f"Warning: {DATA_PATH} is older than {DATA_CSV_PATH}, reading the CSV instead "
+              "(rerun prepare_artifacts.py)")
+        use_parquet = False
+
+    if use_parquet:
+        import pyarrow.parquet as pq
+
+        available = pq.read_schema(DATA_PATH).names
+        df = pd.read_parquet(DATA_PATH, columns=[c for c in DATA_COLUMNS if c in available])
+    elif DATA_CSV_PATH.exists():
+        df = pd.read_csv(DATA_CSV_PATH, usecols=lambda c: c in DATA_COLUMNS)
+    else:
+        raise FileNotFoundError(f"Data file not found at {DATA_PATH} or {DATA_CSV_PATH}")
+    for col in FILTER_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    # Mapping a categorical only lowercases its categories, not every row
+    df["city_lc"] = df["city"].map(str.lower, na_action="ignore").astype("category")
+    return df
+
+
+def compute_location_stats(df, by):
+    """
+    Precompute price statistics for every location group in the dataset
+
+    Keys are tuples of the ``by`` column values; an empty ``by`` summarises
+    the whole dataset under the ``()`` key.
+    """
+    import pandas as pd
+
+    by = list(by)
+    groups = by or pd.Series(0, index=df.index)
+    grouped = df.groupby(groups, observed=True).agg(
+        count=("Price", "size"),
+        avg_price=("Price", "mean"),
+        min_price=("Price", "min"),
+        max_price=("Price", "max"),
+        avg_area=("Area (m²)", "mean"),
+        avg_rooms=("Number of rooms", "mean"),
+        avg_year=("year_const", "mean"),
+    )
+    stats = {}
+    for key, row in grouped.to_dict("index").items():
+        if not by:
+            key = ()
+        elif len(by) == 1:
+            key = (key,)
+        stats[key] = {
+            "count": int(row["count"]),
+            "avg_price": round(float(row["avg_price"]), 2),
+            "min_price": round(float(row["min_price"]), 2),
+            "max_price": round(float(row["max_price"]), 2),
+            "avg_area": round(float(row["avg_area"]), 2),
+            "avg_rooms": round(float(row["avg_rooms"]), 2),
+            "avg_year": int(row["avg_year"]),
+        }
+    return stats
+
+
+def compute_filter_stats(df):
+    """
+    Precompute statistics for every combination of location filters
+
+    Keys are ``(voivodeship, city, district)`` tuples where ``None`` stands
+    for a filter that was not applied. Filter columns missing from the
+    dataset are skipped.
+    """
+    columns = [c for c in FILTER_COLUMNS if c in df.columns]
+    filter_stats = {}
+    for n in range(len(columns) + 1):
+        for combo in combinations(columns, n):
+            for values, stats in compute_location_stats(df, combo).items():
+                applied = dict(zip(combo, values))
+                filter_stats[tuple(applied.get(c) for c in FILTER_COLUMNS)] = stats
+    return filter_stats
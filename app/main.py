@@ -1,10 +1,12 @@
 """
 FastAPI application for property price prediction
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import numpy as np
-import pandas as pd
+import orjson
+import warnings
 from datetime import datetime
 
 from .models import (
@@ -13,21 +15,76 @@ from .models import (
     FilterRequest,
     ModelInfo
 )
+from .batching import PredictionBatcher
+from .cache import PredictionCache
+from .responses import ORJSONResponse
 from .config import (
-    get_model,
-    get_encoders,
-    get_features,
+    load_model,
+    load_compiled_model,
+    load_encoders,
+    load_features,
+    load_dataframe,
+    compute_location_stats,
+    compute_filter_stats,
     MODEL_METADATA,
-    DATA_DIR
+    PREDICT_MAX_BATCH,
+    PREDICT_MAX_WAIT_MS,
+    PREDICT_TIMEOUT_S,
+    PREDICTION_CACHE_SIZE
 )
 
+# The model is fitted on a DataFrame but fed plain float32 rows at prediction
+# time, so silence sklearn's per-call feature-name warning
+warnings.filterwarnings(
+    "ignore",
+    message="X does not have valid feature names",
+    category=UserWarning,
+    module="sklearn"
+)
+
+# Categorical model features encoded with label encoders
+CATEGORICAL_FEATURES = ['Heating', 'Building material', 'Building type', 'Market', 'voivodeship', 'city']
+
+# Every feature a prediction request can provide; the model may use a subset
+INPUT_FEATURES = ['Area (m²)', 'Number of rooms', 'year_const'] + CATEGORICAL_FEATURES
+
+# Model feature order and per-column label -> code lookups, built on startup
+FEATURE_ORDER: list[str] = []
+ENC_MAP: dict[str, dict[str, int]] = {}
+
+# Batches concurrent model calls, started on startup
+BATCHER: PredictionBatcher = None
+
+# Memoized predictions keyed by the encoded feature row
+PREDICTIONS = PredictionCache(maxsize=PREDICTION_CACHE_SIZE)
+
+# Local statistics keyed by (lowercased city,), built on startup
+CITY_STATS: dict[tuple, dict] = {}
+
+# Filter statistics keyed by (voivodeship, city, district), built on startup
+FILTER_STATS: dict[tuple, dict] = {}
+
+# Constant responses, serialized once
+ROOT_JSON = orjson.dumps({
+    "message": "Welcome to Property Price Prediction API",
+    "version": "1.0.0",
+    "endpoints": {
+        "predict": "/predict - POST request to predict property price",
+        "info": "/info - GET model information",
+        "docs": "/docs - API documentation",
+        "health": "/health - Health check"
+    }
+})
+INFO_JSON = orjson.dumps(ModelInfo(**MODEL_METADATA).model_dump())
+
 # Create FastAPI app
 app = FastAPI(
     title="Property Price Prediction API",
     description="AI-powered system for predicting residential property prices in Poland",
     version="1.0.0",
     docs_url=None,
-    redoc_url="/docs"
+    redoc_url="/docs",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware to allow cross-origin requests
@@ -43,53 +100,80 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_event():
     """Load models and data on startup"""
+    global CITY_STATS, FILTER_STATS, FEATURE_ORDER, ENC_MAP, BATCHER
     try:
-        model = get_model()
-        encoders = get_encoders()
-        features = get_features()
+        predict_fn = load_compiled_model()
+        if predict_fn is None:
+            model = load_model()
+            # The notebook fits with n_jobs=-1, verbose=1; one thread per call
+            # avoids oversubscribing cores across workers and silences the
+            # per-batch joblib log line
+            model.set_params(n_jobs=1, verbose=0)
+            predict_fn = model.predict
+            print("✓ Using sklearn model for predictions")
+        else:
+            print("✓ Using compiled model for predictions")
+        encoders = load_encoders()
+        features = load_features()
         print("✓ Models loaded successfully")
+        
+        missing = [col for col in features if col not in INPUT_FEATURES]
+        if missing:
+            raise ValueError(f"Model features {missing} cannot be filled from a prediction request")
+        FEATURE_ORDER = list(features)
+        ENC_MAP = {
+            col: {label: code for code, label in enumerate(encoders[col].classes_)}
+            for col in CATEGORICAL_FEATURES
+            if col in encoders
+        }
+        
+        BATCHER = PredictionBatcher(
+            predict_fn,
+            n_features=len(FEATURE_ORDER),
+            max_batch=PREDICT_MAX_BATCH,
+            max_wait_ms=PREDICT_MAX_WAIT_MS
+        )
+        BATCHER.start()
+        
+        # The dataset is only needed to build the lookup tables below
+        df = load_dataframe()
+        print(f"✓ Dataset loaded ({len(df)} properties)")
+        
+        CITY_STATS = compute_location_stats(df, ['city_lc'])
+        FILTER_STATS = compute_filter_stats(df)
+        print(f"✓ Local statistics precomputed ({len(CITY_STATS)} cities)")
     except Exception as e:
         print(f"✗ Error loading models: {e}")
         raise
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the prediction batcher on shutdown"""
+    if BATCHER is not None:
+        await BATCHER.stop()
+
+
 @app.get("/", tags=["Info"])
 async def root():
     """Root endpoint with API information"""
-    return {
-        "message": "Welcome to Property Price Prediction API",
-        "version": "1.0.0",
-        "endpoints": {
-            "predict": "/predict - POST request to predict property price",
-            "info": "/info - GET model information",
-            "docs": "/docs - API documentation",
-            "health": "/health - Health check"
-        }
-    }
+    return Response(ROOT_JSON, media_type="application/json")
 
 
 @app.get("/health", tags=["Info"])
 async def health_check():
     """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat()
-    }
+    timestamp = datetime.now().isoformat().encode()
+    return Response(
+        b'{"status":"healthy","timestamp":"' + timestamp + b'"}',
+        media_type="application/json"
+    )
 
 
 @app.get("/info", response_model=ModelInfo, tags=["Info"])
 async def get_model_info():
     """Get information about the trained model"""
-    return ModelInfo(
-        model_type=MODEL_METADATA["model_type"],
-        algorithm=MODEL_METADATA["algorithm"],
-        features_used=MODEL_METADATA["features_used"],
-        training_samples=MODEL_METADATA["training_samples"],
-        test_r2_score=MODEL_METADATA["test_r2_score"],
-        test_rmse=MODEL_METADATA["test_rmse"],
-        test_mae=MODEL_METADATA["test_mae"],
-        last_updated=MODEL_METADATA["last_updated"]
-    )
+    return Response(INFO_JSON, media_type="application/json")
 
 
 @app.post("/predict", response_model=PredictionResponse, tags=["Prediction"])
@@ -113,74 +197,54 @@ async def predict_price(request: PredictionRequest):
     ```
     """
     try:
-        # Load model, encoders and features
-        model = get_model()
-        encoders = get_encoders()
-        features = get_features()
-        
-        # Prepare input data
-        feature_dict = {
-            'Area (m²)': request.area,
-            'Number of rooms': request.rooms,
-            'year_const': request.year_constructed,
-            'Heating': request.heating.value,
-            'Building material': request.building_material.value,
-            'Building type': request.building_type.value,
-            'Market': request.market.value,
-            'voivodeship': request.voivodeship.value,
-            'city': request.city if request.city else 'Unknown',
-        }
-        
-        # Encode categorical features
-        X = pd.DataFrame([feature_dict])
+        # Reuse the prediction for inputs seen before, otherwise run the
+        # model batched with concurrent requests
+        row = encode_request(request)
+        key = row.tobytes()
+        prediction = PREDICTIONS.get(key)
+        if prediction is None:
+            prediction = await asyncio.wait_for(BATCHER.predict(row), PREDICT_TIMEOUT_S)
+            PREDICTIONS.put(key, prediction)
         
-        for col in ['Heating', 'Building material', 'Building type', 'Market', 'voivodeship', 'city']:
-            if col in encoders:
-                X[col] = encoders[col].transform(X[col])
-        
-        # Reorder columns to match training features
-        X = X[features]
-        
-        # Make prediction
-        prediction = model.predict(X)[0]
-        
-        # Calculate local statistics for city
+        # Look up precomputed local statistics for city
         local_stats = None
-        try:
-            df = pd.read_csv(DATA_DIR / "data_processed.csv")
-            filtered_df = df.copy()
-            
-            if request.city:
-                filtered_df = filtered_df[filtered_df['city'].str.lower() == request.city.lower()]
-            
-            if len(filtered_df) > 0:
-                local_stats = {
-                    "location": {
-                        "city": request.city
-                    },
-                    "properties_count": len(filtered_df),
-                    "avg_price": round(float(filtered_df['Price'].mean()), 2),
-                    "min_price": round(float(filtered_df['Price'].min()), 2),
-                    "max_price": round(float(filtered_df['Price'].max()), 2),
-                    "avg_area": round(float(filtered_df['Area (m²)'].mean()), 2),
-                    "avg_rooms": round(float(filtered_df['Number of rooms'].mean()), 2),
-                    "avg_year": int(filtered_df['year_const'].mean())
-                }
-        except Exception as e:
-            # If local stats fail, continue with prediction only
-            print(f"Warning: Could not load local statistics: {e}")
+        if request.city:
+            city_stats = CITY_STATS.get((request.city.lower(),))
+        else:
+            # Without a city, summarise the whole dataset
+            city_stats = FILTER_STATS.get((None, None, None))
+        if city_stats:
+            local_stats = {
+                "location": {
+                    "city": request.city
+                },
+                "properties_count": city_stats["count"],
+                "avg_price": city_stats["avg_price"],
+                "min_price": city_stats["min_price"],
+                "max_price": city_stats["max_price"],
+                "avg_area": city_stats["avg_area"],
+                "avg_rooms": city_stats["avg_rooms"],
+                "avg_year": city_stats["avg_year"]
+            }
         
         # Determine confidence based on input reasonableness
         confidence = determine_confidence(request, prediction)
         
-        return PredictionResponse(
-            predicted_price=round(float(prediction), 2),
-            currency="PLN",
-            confidence=confidence,
-            input_features=request,
-            local_stats=local_stats
-        )
+        # Return the response directly so it skips re-validation against
+        # response_model, which is kept for the API documentation
+        return ORJSONResponse({
+            "predicted_price": round(float(prediction), 2),
+            "currency": "PLN",
+            "confidence": confidence,
+            "input_features": request.model_dump(mode="json"),
+            "local_stats": local_stats
+        })
         
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail="Prediction timed out"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=400,
@@ -199,78 +263,71 @@ async def filter_properties(
     
     Returns statistics about properties matching the filter criteria
     """
-    try:
-        # Load processed data
-        df = pd.read_csv(DATA_DIR / "data_processed.csv")
-        
-        # Apply filters
-        filtered_df = df.copy()
-        
-        if voivodeship:
-            filtered_df = filtered_df[filtered_df['voivodeship'] == voivodeship]
-        
-        if city:
-            filtered_df = filtered_df[filtered_df['city'] == city]
-        
-        if district:
-            filtered_df = filtered_df[filtered_df['district'] == district]
-        
-        if len(filtered_df) == 0:
-            raise HTTPException(
-                status_code=404,
-                detail="No properties found matching the filter criteria"
-            )
-        
-        # Calculate statistics
-        stats = {
-            "count": len(filtered_df),
-            "avg_price": round(float(filtered_df['Price'].mean()), 2),
-            "min_price": round(float(filtered_df['Price'].min()), 2),
-            "max_price": round(float(filtered_df['Price'].max()), 2),
-            "avg_area": round(float(filtered_df['Area (m²)'].mean()), 2),
-            "avg_rooms": round(float(filtered_df['Number of rooms'].mean()), 2),
-            "filters_applied": {
-                "voivodeship": voivodeship,
-                "city": city,
-                "district": district
-            }
-        }
-        
-        return stats
-        
-    except Exception as e:
+    stats = FILTER_STATS.get((voivodeship or None, city or None, district or None))
+    
+    if stats is None:
         raise HTTPException(
-            status_code=400,
-            detail=f"Error filtering properties: {str(e)}"
+            status_code=404,
+            detail="No properties found matching the filter criteria"
         )
+    
+    return {
+        "count": stats["count"],
+        "avg_price": stats["avg_price"],
+        "min_price": stats["min_price"],
+        "max_price": stats["max_price"],
+        "avg_area": stats["avg_area"],
+        "avg_rooms": stats["avg_rooms"],
+        "filters_applied": {
+            "voivodeship": voivodeship,
+            "city": city,
+            "district": district
+        }
+    }
+
+
+def encode_request(request: PredictionRequest) -> np.ndarray:
+    """Encode a prediction request into a row in training feature order"""
+    feature_dict = {
+        'Area (m²)': request.area,
+        'Number of rooms': request.rooms,
+        'year_const': request.year_constructed,
+        'Heating': request.heating.value,
+        'Building material': request.building_material.value,
+        'Building type': request.building_type.value,
+        'Market': request.market.value,
+        'voivodeship': request.voivodeship.value,
+        'city': request.city if request.city else 'Unknown',
+    }
+    
+    # Fill only the features the model uses; columns without an encoder
+    # are passed through as-is
+    row = np.empty(len(FEATURE_ORDER), dtype=np.float32)
+    for i, col in enumerate(FEATURE_ORDER):
+        value = feature_dict[col]
+        if col in ENC_MAP:
+            value = encode_label(col, value)
+        row[i] = value
+    return row
+
+
+def encode_label(col: str, value: str) -> int:
+    """Map a categorical value to the code its label encoder assigned"""
+    try:
+        return ENC_MAP[col][value]
+    except KeyError:
+        raise ValueError(f"Unknown value for '{col}': {value!r}") from None
 
 
 def determine_confidence(request: PredictionRequest, prediction: float) -> str:
     """Determine confidence level based on input characteristics"""
-    confidence_score = 0.0
-    
-    # Area between 40-200 m² is common
-    if 40 <= request.area <= 200:
-        confidence_score += 0.3
-    
-    # Rooms between 2-5 is common
-    if 2 <= request.rooms <= 5:
-        confidence_score += 0.2
-    
-    # Year between 1960-2025
-    if 1960 <= request.year_constructed <= 2025:
-        confidence_score += 0.2
-    
-    # Typical price range
-    if 100000 <= prediction <= 1500000:
-        confidence_score += 0.3
-    
-    if confidence_score >= 0.8:
-        return "High"
-    elif confidence_score >= 0.5:
-        return "Medium"
-    else:
-        return "Low"
+    confidence_score = (
+        0.3 * (40 <= request.area <= 200)                      # Area between 40-200 m² is common
+        + 0.2 * (2 <= request.rooms <= 5)                      # Rooms between 2-5 is common
+        + 0.2 * (1960 <= request.year_constructed <= 2025)     # Year between 1960-2025
+        + 0.3 * (100000 <= prediction <= 1500000)              # Typical price range
+    )
+    return "High" if confidence_score >= 0.8 else "Medium" if confidence_score >= 0.5 else "Low"
 
 
 # Error handlers
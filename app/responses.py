@@ -0,0 +1,20 @@
+"""
+Response classes for the API
+"""
+from typing import Any
+
+import orjson
+from starlette.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response serialized with orjson
+
+    Defined here rather than imported from fastapi.responses, whose
+    ORJSONResponse emits a deprecation warning on every use in newer
+    FastAPI releases.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+One-time preparation of model and data artifacts for serving
+"""
+import sys
+from pathlib import Path
+
+import joblib
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.config import (
+    MODEL_PATH,
+    COMPILED_MODEL_PATH,
+    DATA_PATH,
+    DATA_CSV_PATH,
+    DATA_COLUMNS
+)
+
+
+def compile_model():
+    """Compile the forest to a native shared library with Treelite"""
+    try:
+        import treelite
+        import treelite.sklearn
+    except ImportError:
+        print("✗ treelite not installed, skipping model compilation")
+        return
+    try:
+        model = joblib.load(MODEL_PATH)
+        tl_model = treelite.sklearn.import_model(model)
+        tl_model.export_lib(
+            toolchain="gcc",
+            libpath=str(COMPILED_MODEL_PATH),
+            params={"parallel_comp": 32}
+        )
+    except Exception as e:
+        print(f"✗ Model compilation failed, the API will use the sklearn model: {e}")
+        return
+    print(f"✓ Model compiled to {COMPILED_MODEL_PATH}")
+
+
+def convert_dataset():
+    """Save the columns of the processed dataset used by the API as Parquet"""
+    import pandas as pd
+
+    df = pd.read_csv(DATA_CSV_PATH, usecols=lambda c: c in DATA_COLUMNS)
+    df.to_parquet(DATA_PATH, index=False)
+    print(f"✓ Dataset saved to {DATA_PATH}")
+
+
+if __name__ == "__main__":
+    convert_dataset()
+    compile_model()
@@ -2,6 +2,7 @@
 """
 Run the FastAPI server
 """
+import os
 import uvicorn
 import sys
 from pathlib import Path
@@ -10,11 +11,18 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 if __name__ == "__main__":
+    # Auto-reload for development; uvicorn runs a single worker when reloading
+    reload = os.getenv("RELOAD", "").lower() in ("1", "true", "yes")
+    
     # Run the server
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        workers=1 if reload else int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        loop="auto",
+        http="auto",
+        access_log=reload,
+        reload=reload,
         log_level="info"
     )
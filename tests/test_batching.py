@@ -0,0 +1,147 @@
+"""
+Tests for the prediction micro-batcher
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.batching import PredictionBatcher
+
+
+def row(value):
+    return np.array([value, 0.0], dtype=np.float32)
+
+
+def test_each_request_gets_its_own_row_result():
+    batch_sizes = []
+
+    def predict_fn(X):
+        batch_sizes.append(len(X))
+        return X[:, 0] * 2
+
+    async def run():
+        batcher = PredictionBatcher(predict_fn, n_features=2, max_batch=8, max_wait_ms=20)
+        batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.predict(row(i)) for i in range(50)))
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(run())
+
+    assert results == [i * 2 for i in range(50)]
+    assert max(batch_sizes) > 1
+    assert max(batch_sizes) <= 8
+    assert sum(batch_sizes) == 50
+
+
+def test_errors_reach_every_request_in_the_batch_and_batcher_recovers():
+    fail = True
+
+    def predict_fn(X):
+        if fail:
+            raise ValueError("model failed")
+        return X[:, 0]
+
+    async def run():
+        nonlocal fail
+        batcher = PredictionBatcher(predict_fn, n_features=2, max_batch=4, max_wait_ms=20)
+        batcher.start()
+        try:
+            failed = await asyncio.gather(
+                *(batcher.predict(row(i)) for i in range(4)), return_exceptions=True
+            )
+            fail = False
+            recovered = await batcher.predict(row(7))
+        finally:
+            await batcher.stop()
+        return failed, recovered
+
+    failed, recovered = asyncio.run(run())
+
+    assert all(isinstance(e, ValueError) for e in failed)
+    assert recovered == 7
+
+
+def test_max_batch_one_predicts_each_row_without_background_task():
+    batch_sizes = []
+
+    def predict_fn(X):
+        batch_sizes.append(len(X))
+        return X[:, 0] + 1
+
+    async def run():
+        batcher = PredictionBatcher(predict_fn, n_features=2, max_batch=1)
+        batcher.start()
+        assert batcher._task is None
+        results = await asyncio.gather(*(batcher.predict(row(i)) for i in range(5)))
+        await batcher.stop()
+        return results
+
+    assert asyncio.run(run()) == [1, 2, 3, 4, 5]
+    assert batch_sizes == [1] * 5
+
+
+def test_errors_propagate_with_max_batch_one():
+    def predict_fn(X):
+        raise ValueError("model failed")
+
+    async def run():
+        batcher = PredictionBatcher(predict_fn, n_features=2, max_batch=1)
+        batcher.start()
+        await batcher.predict(row(0))
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())
+
+
+def squeezing_predict_fn(X):
+    # Mimics Treelite, which returns a 0-d array for a one-row batch
+    return np.squeeze(X[:, 0] * 2)
+
+
+@pytest.mark.parametrize("max_batch", [8, 1])
+def test_single_row_batch_from_squeezing_backend(max_batch):
+    async def run():
+        batcher = PredictionBatcher(squeezing_predict_fn, n_features=2, max_batch=max_batch)
+        batcher.start()
+        try:
+            return await asyncio.wait_for(batcher.predict(row(3)), timeout=1)
+        finally:
+            await batcher.stop()
+
+    assert asyncio.run(run()) == 6
+
+
+def test_failures_after_the_model_call_reach_the_batch_and_batcher_recovers():
+    short = True
+
+    def predict_fn(X):
+        # Drops a result while `short` is set
+        return X[1:, 0] if short else X[:, 0]
+
+    async def run():
+        nonlocal short
+        batcher = PredictionBatcher(predict_fn, n_features=2, max_batch=4, max_wait_ms=20)
+        batcher.start()
+        try:
+            failed = await asyncio.wait_for(
+                asyncio.gather(*(batcher.predict(row(i)) for i in range(4)), return_exceptions=True),
+                timeout=1
+            )
+            bad_shape = await asyncio.wait_for(
+                asyncio.gather(batcher.predict(np.zeros(3, dtype=np.float32)), return_exceptions=True),
+                timeout=1
+            )
+            short = False
+            recovered = await asyncio.wait_for(batcher.predict(row(5)), timeout=1)
+        finally:
+            await batcher.stop()
+        return failed, bad_shape, recovered
+
+    failed, bad_shape, recovered = asyncio.run(run())
+
+    assert all(isinstance(e, ValueError) for e in failed)
+    assert isinstance(bad_shape[0], ValueError)
+    assert recovered == 5
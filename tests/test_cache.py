@@ -0,0 +1,36 @@
+"""
+Tests for the prediction cache
+"""
+from app.cache import PredictionCache
+
+
+def test_evicts_least_recently_used_entry():
+    cache = PredictionCache(maxsize=2)
+    cache.put("a", 1.0)
+    cache.put("b", 2.0)
+    assert cache.get("a") == 1.0
+
+    cache.put("c", 3.0)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1.0
+    assert cache.get("c") == 3.0
+
+
+def test_overwriting_a_key_refreshes_it():
+    cache = PredictionCache(maxsize=2)
+    cache.put("a", 1.0)
+    cache.put("b", 2.0)
+    cache.put("a", 10.0)
+
+    cache.put("c", 3.0)
+
+    assert cache.get("a") == 10.0
+    assert cache.get("b") is None
+
+
+def test_size_zero_disables_caching():
+    cache = PredictionCache(maxsize=0)
+    cache.put("a", 1.0)
+
+    assert cache.get("a") is None
@@ -0,0 +1,76 @@
+"""
+Tests for the precomputed location statistics
+"""
+import pandas as pd
+import pytest
+
+from app.config import FILTER_COLUMNS, compute_filter_stats, compute_location_stats
+
+
+@pytest.fixture
+def df():
+    frame = pd.DataFrame({
+        "Price": [300000.0, 450000.0, 250000.0, 800000.0, 520000.0, 610000.0],
+        "Area (m²)": [50.0, 72.5, 40.0, 120.0, 80.0, 95.0],
+        "Number of rooms": [2, 3, 2, 5, 3, 4],
+        "year_const": [1985, 2010, 1970, 2020, 2005, 2015],
+        "voivodeship": ["mazowieckie", "mazowieckie", "małopolskie", "małopolskie", "mazowieckie", "śląskie"],
+        "city": ["Warszawa", "Warszawa", "Kraków", "Kraków", "Płock", "Katowice"],
+        "district": ["Mokotów", "Wola", "Podgórze", "Podgórze", None, "Centrum"],
+    })
+    for col in FILTER_COLUMNS:
+        frame[col] = frame[col].astype("category")
+    return frame
+
+
+def expected_stats(frame):
+    return {
+        "count": len(frame),
+        "avg_price": round(float(frame["Price"].mean()), 2),
+        "min_price": round(float(frame["Price"].min()), 2),
+        "max_price": round(float(frame["Price"].max()), 2),
+        "avg_area": round(float(frame["Area (m²)"].mean()), 2),
+        "avg_rooms": round(float(frame["Number of rooms"].mean()), 2),
+        "avg_year": int(frame["year_const"].mean()),
+    }
+
+
+def test_filter_stats_match_direct_filtering(df):
+    filter_stats = compute_filter_stats(df)
+
+    queries = [
+        (None, None, None),
+        ("mazowieckie", None, None),
+        (None, "Kraków", None),
+        (None, None, "Podgórze"),
+        ("mazowieckie", "Warszawa", None),
+        ("małopolskie", None, "Podgórze"),
+        ("mazowieckie", "Warszawa", "Wola"),
+    ]
+    for query in queries:
+        mask = pd.Series(True, index=df.index)
+        for col, value in zip(FILTER_COLUMNS, query):
+            if value is not None:
+                mask &= df[col] == value
+        assert filter_stats[query] == expected_stats(df[mask]), query
+
+
+def test_filter_stats_only_contain_observed_combinations(df):
+    filter_stats = compute_filter_stats(df)
+
+    assert ("śląskie", "Kraków", None) not in filter_stats
+    assert all(stats["count"] > 0 for stats in filter_stats.values())
+
+
+def test_filter_stats_skip_missing_columns(df):
+    filter_stats = compute_filter_stats(df.drop(columns="district"))
+
+    assert all(key[2] is None for key in filter_stats)
+    assert filter_stats[(None, "Kraków", None)]["count"] == 2
+
+
+def test_location_stats_are_keyed_by_tuples(df):
+    stats = compute_location_stats(df, ["city"])
+
+    assert set(stats) == {("Warszawa",), ("Kraków",), ("Płock",), ("Katowice",)}
+    assert stats[("Warszawa",)] == expected_stats(df[df["city"] == "Warszawa"])